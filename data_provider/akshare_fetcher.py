@@ -91,6 +91,66 @@ _etf_realtime_cache: Dict[str, Any] = {
 }
 
 
+# 市场级接口磁盘缓存（指数行情/全市场行情/板块行情）
+# 复盘流程常在短时间内重复执行（开发调试、报告重生成、重试），
+# 磁盘缓存让重跑免去网络抓取 + akshare 解析；键按接口名+自然日，
+# TTL 用文件 mtime 判定，跨进程同样生效
+_MARKET_CACHE_DIR = "./.cache/market"
+
+
+# 进程内一级缓存：同一次运行里重复取同一快照时连磁盘反序列化都省掉
+# {name: (写入时刻, DataFrame)}，FIFO 淘汰防止无限增长
+_MARKET_MEM_CACHE: Dict[str, Tuple[float, pd.DataFrame]] = {}
+_MARKET_MEM_TTL = 120.0
+_MARKET_MEM_MAX = 16
+
+
+def _mem_cache_get(name: str, ttl: int) -> Optional[pd.DataFrame]:
+    """内存缓存读取，TTL 取磁盘 TTL 与 120s 的较小者"""
+    hit = _MARKET_MEM_CACHE.get(name)
+    if hit is not None and time.monotonic() - hit[0] < min(ttl, _MARKET_MEM_TTL):
+        return hit[1]
+    return None
+
+
+def _mem_cache_put(name: str, df: pd.DataFrame) -> None:
+    if name not in _MARKET_MEM_CACHE and len(_MARKET_MEM_CACHE) >= _MARKET_MEM_MAX:
+        _MARKET_MEM_CACHE.pop(next(iter(_MARKET_MEM_CACHE)))
+    _MARKET_MEM_CACHE[name] = (time.monotonic(), df)
+
+
+def _load_market_cache(name: str, ttl: int) -> Optional[pd.DataFrame]:
+    """按接口名读取当日缓存（内存 -> 磁盘），过期/缺失/损坏时返回 None"""
+    df = _mem_cache_get(name, ttl)
+    if df is not None:
+        return df
+    try:
+        path = os.path.join(
+            _MARKET_CACHE_DIR, f"{name}_{datetime.now().strftime('%Y%m%d')}.pkl"
+        )
+        if os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl:
+            df = pd.read_pickle(path)
+            logger.debug(f"[磁盘缓存命中] {name} - 年龄 {int(time.time() - os.path.getmtime(path))}s/{ttl}s")
+            _mem_cache_put(name, df)
+            return df
+    except Exception as e:
+        logger.debug(f"[磁盘缓存] 读取 {name} 失败（忽略，回退网络）: {e}")
+    return None
+
+
+def _store_market_cache(name: str, df: pd.DataFrame) -> None:
+    """将接口返回写入当日缓存（内存 + 磁盘），磁盘失败时静默忽略"""
+    _mem_cache_put(name, df)
+    try:
+        os.makedirs(_MARKET_CACHE_DIR, exist_ok=True)
+        path = os.path.join(
+            _MARKET_CACHE_DIR, f"{name}_{datetime.now().strftime('%Y%m%d')}.pkl"
+        )
+        df.to_pickle(path)
+    except Exception as e:
+        logger.debug(f"[磁盘缓存] 写入 {name} 失败（忽略）: {e}")
+
+
 def _is_etf_code(stock_code: str) -> bool:
     """
     判断代码是否为 ETF 基金
@@ -1518,63 +1578,105 @@ class AkshareFetcher(BaseFetcher):
         }
 
         try:
-            self._set_random_user_agent()
-            self._enforce_rate_limit()
-
-            # 使用 akshare 获取指数行情（新浪财经接口）
-            df = ak.stock_zh_index_spot_sina()
+            # 使用 akshare 获取指数行情（新浪财经接口），5 分钟磁盘缓存
+            df = _load_market_cache('index_spot_sina', ttl=300)
+            if df is None:
+                self._set_random_user_agent()
+                self._enforce_rate_limit()
+                df = ak.stock_zh_index_spot_sina()
+                if df is not None and not df.empty:
+                    _store_market_cache('index_spot_sina', df)
 
             results = []
             if df is not None and not df.empty:
-                for code, name in indices_map.items():
-                    # 查找对应指数
-                    row = df[df['代码'] == code]
-                    if row.empty:
-                        # 尝试带前缀查找
-                        row = df[df['代码'].str.contains(code)]
-
-                    if not row.empty:
-                        row = row.iloc[0]
-                        current = safe_float(row.get('最新价', 0))
-                        prev_close = safe_float(row.get('昨收', 0))
-                        high = safe_float(row.get('最高', 0))
-                        low = safe_float(row.get('最低', 0))
-
-                        # 计算振幅
-                        amplitude = 0.0
-                        if prev_close > 0:
-                            amplitude = (high - low) / prev_close * 100
-
-                        results.append({
-                            'code': code,
-                            'name': name,
-                            'current': current,
-                            'change': safe_float(row.get('涨跌额', 0)),
-                            'change_pct': safe_float(row.get('涨跌幅', 0)),
-                            'open': safe_float(row.get('今开', 0)),
-                            'high': high,
-                            'low': low,
-                            'prev_close': prev_close,
-                            'volume': safe_float(row.get('成交量', 0)),
-                            'amount': safe_float(row.get('成交额', 0)),
-                            'amplitude': amplitude,
-                        })
+                import numpy as np
+
+                codes = list(indices_map)
+                # 按代码建一次索引，reindex 批量对齐全部目标指数（代码重复时取首行）
+                code_series = df['代码'].astype(str)
+                lookup = df.set_index(code_series)
+                lookup = lookup[~lookup.index.duplicated(keep='first')]
+                sub = lookup.reindex(codes)
+
+                # 精确匹配不到的代码，退回带前缀子串查找（regex=False 避免正则编译）
+                for pos, code in enumerate(codes):
+                    if code not in lookup.index:
+                        mask = code_series.str.contains(code, regex=False)
+                        if mask.any():
+                            sub.iloc[pos] = df[mask].iloc[0]
+
+                # 完全未命中的代码整行为 NaN，按行掩码剔除
+                present = sub.notna().any(axis=1).to_numpy()
+
+                def _col(col_name: str):
+                    """整列一次性数值化提取（缺列退化为全 0，脏值保留 NaN）"""
+                    if col_name in sub.columns:
+                        return pd.to_numeric(
+                            sub[col_name], errors='coerce'
+                        ).to_numpy(dtype=np.float64)
+                    return np.zeros(len(codes), dtype=np.float64)
+
+                def _f(v) -> Optional[float]:
+                    """NaN → None，与 safe_float 对脏值的语义一致"""
+                    return float(v) if v == v else None
+
+                cur = _col('最新价')
+                chg = _col('涨跌额')
+                pct = _col('涨跌幅')
+                opn = _col('今开')
+                high = _col('最高')
+                low = _col('最低')
+                prev = _col('昨收')
+                vol = _col('成交量')
+                amt = _col('成交额')
+                # 振幅一次性向量化计算（不可算的行归 0）
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    amp = np.where(prev > 0, (high - low) / prev * 100.0, 0.0)
+                amp = np.where(np.isfinite(amp), amp, 0.0)
+
+                results = [
+                    {
+                        'code': code,
+                        'name': name,
+                        'current': _f(cur[i]),
+                        'change': _f(chg[i]),
+                        'change_pct': _f(pct[i]),
+                        'open': _f(opn[i]),
+                        'high': _f(high[i]),
+                        'low': _f(low[i]),
+                        'prev_close': _f(prev[i]),
+                        'volume': _f(vol[i]),
+                        'amount': _f(amt[i]),
+                        'amplitude': float(amp[i]),
+                    }
+                    for i, (code, name) in enumerate(indices_map.items())
+                    if present[i]
+                ]
             return results
 
         except Exception as e:
             logger.error(f"[Akshare] 获取指数行情失败: {e}")
             return None
 
-    def get_market_stats(self) -> Optional[Dict[str, Any]]:
+    def get_market_stats(self, include_amount: bool = True) -> Optional[Dict[str, Any]]:
         """
         获取市场涨跌统计
 
         数据源优先级：
         1. 东财接口 (ak.stock_zh_a_spot_em)
         2. 新浪接口 (ak.stock_zh_a_spot)
+
+        Args:
+            include_amount: 是否统计两市成交额。只需涨跌/涨跌停计数的调用方
+                            可传 False 跳过全列求和，total_amount 返回 0。
         """
         import akshare as ak
 
+        # 磁盘缓存：全市场快照 5 分钟内复用（重跑复盘时免抓全表）
+        df = _load_market_cache('market_spot', ttl=300)
+        if df is not None and not df.empty:
+            return self._calc_market_stats(df, include_amount=include_amount)
+
         # 优先东财接口
         try:
             self._set_random_user_agent()
@@ -1583,7 +1685,8 @@ class AkshareFetcher(BaseFetcher):
             logger.info("[API调用] ak.stock_zh_a_spot_em() 获取市场统计...")
             df = ak.stock_zh_a_spot_em()
             if df is not None and not df.empty:
-                return self._calc_market_stats(df)
+                _store_market_cache('market_spot', df)
+                return self._calc_market_stats(df, include_amount=include_amount)
         except Exception as e:
             logger.warning(f"[Akshare] 东财接口获取市场统计失败: {e}，尝试新浪接口")
 
@@ -1595,7 +1698,8 @@ class AkshareFetcher(BaseFetcher):
             logger.info("[API调用] ak.stock_zh_a_spot() 获取市场统计(新浪)...")
             df = ak.stock_zh_a_spot()
             if df is not None and not df.empty:
-                return self._calc_market_stats(df)
+                _store_market_cache('market_spot', df)
+                return self._calc_market_stats(df, include_amount=include_amount)
         except Exception as e:
             logger.error(f"[Akshare] 新浪接口获取市场统计也失败: {e}")
 
@@ -1604,75 +1708,62 @@ class AkshareFetcher(BaseFetcher):
     def _calc_market_stats(
         self,
         df: pd.DataFrame,
+        include_amount: bool = True,
         ) -> Optional[Dict[str, Any]]:
-        """从行情 DataFrame 计算涨跌统计。"""
+        """从行情 DataFrame 计算涨跌统计（向量化，~5000 行一次扫完）。"""
         import numpy as np
 
-        df = df.copy()
-        
         # 1. 提取基础比对数据：最新价、昨收
         # 兼容不同接口返回的列名 sina/em efinance tushare xtdata
         code_col = next((c for c in ['代码', '股票代码', 'ts_code','stock_code'] if c in df.columns), None)
         name_col = next((c for c in ['名称', '股票名称','name','name'] if c in df.columns), None)
         close_col = next((c for c in ['最新价', '最新价', 'close','lastPrice'] if c in df.columns), None)
         pre_close_col = next((c for c in ['昨收', '昨日收盘', 'pre_close','lastClose'] if c in df.columns), None)
-        amount_col = next((c for c in ['成交额', '成交额', 'amount','amount'] if c in df.columns), None) 
-        
-        limit_up_count = 0
-        limit_down_count = 0
-        up_count = 0
-        down_count = 0
-        flat_count = 0
-
-        for code, name, current_price, pre_close, amount in zip(
-            df[code_col], df[name_col], df[close_col], df[pre_close_col], df[amount_col]
-        ):
-            
-            # 停牌过滤 efinance 的停牌数据有时候会缺失价格显示为 '-'，em 显示为none
-            if pd.isna(current_price) or pd.isna(pre_close) or current_price in ['-'] or pre_close in ['-'] or amount == 0:
-                continue
-            
-            # em、efinance 为str 需要转换为float
-            current_price = float(current_price)
-            pre_close = float(pre_close)
-            
-            # 获取去除前缀的纯数字代码
-            pure_code = normalize_stock_code(str(code)) 
-
-            # A. 确定每只股票的涨跌幅比例 (使用纯数字代码判断)
-            if is_bse_code(pure_code): 
-                ratio = 0.30
-            elif is_kc_cy_stock(pure_code): #pure_code.startswith(('688', '30')):
-                ratio = 0.20
-            elif is_st_stock(name): #'ST' in str_name:
-                ratio = 0.05
-            else:
-                ratio = 0.10
-
-            # B. 严格按照 A 股规则计算涨跌停价：昨收 * (1 ± 比例) -> 四舍五入保留2位小数
-            limit_up_price = np.floor(pre_close * (1 + ratio) * 100 + 0.5) / 100.0
-            limit_down_price = np.floor(pre_close * (1 - ratio) * 100 + 0.5) / 100.0
-
-            limit_up_price_Tolerance = round(abs(pre_close * (1 + ratio) - limit_up_price), 10)
-            limit_down_price_Tolerance = round(abs(pre_close * (1 - ratio) - limit_down_price), 10)
+        amount_col = next((c for c in ['成交额', '成交额', 'amount','amount'] if c in df.columns), None)
+
+        # em、efinance 为 str（停牌显示 '-'），coerce 后统一成 float/NaN
+        cur = pd.to_numeric(df[close_col], errors='coerce').to_numpy(dtype=np.float64)
+        pre = pd.to_numeric(df[pre_close_col], errors='coerce').to_numpy(dtype=np.float64)
+        amt = pd.to_numeric(df[amount_col], errors='coerce').to_numpy(dtype=np.float64)
+
+        # 停牌过滤：价格缺失（NaN/'-'）或成交额为 0 的行不参与统计
+        valid = ~np.isnan(cur) & ~np.isnan(pre) & (amt != 0) & (cur > 0)
+
+        # A. 确定每只股票的涨跌幅比例（分类仍走共享判定函数，单次线性遍历）
+        codes = df[code_col].astype(str).map(normalize_stock_code)
+        names = df[name_col]
+        ratio = np.fromiter(
+            (
+                0.30 if is_bse_code(pure_code)
+                else 0.20 if is_kc_cy_stock(pure_code)  # 688/30 开头
+                else 0.05 if is_st_stock(name)
+                else 0.10
+                for pure_code, name in zip(codes, names)
+            ),
+            dtype=np.float64,
+            count=len(df),
+        )
+
+        # B. 严格按照 A 股规则计算涨跌停价：昨收 * (1 ± 比例) -> 四舍五入保留2位小数
+        raw_up = pre * (1 + ratio)
+        raw_down = pre * (1 - ratio)
+        limit_up_price = np.floor(raw_up * 100 + 0.5) / 100.0
+        limit_down_price = np.floor(raw_down * 100 + 0.5) / 100.0
+        up_tolerance = np.round(np.abs(raw_up - limit_up_price), 10)
+        down_tolerance = np.round(np.abs(raw_down - limit_down_price), 10)
+
+        # C. 精确比对（valid 含 NaN 行时比较结果为 False，天然被排除）
+        with np.errstate(invalid='ignore'):
+            limit_up_count = int(np.count_nonzero(valid & (np.abs(cur - limit_up_price) <= up_tolerance)))
+            limit_down_count = int(np.count_nonzero(valid & (np.abs(cur - limit_down_price) <= down_tolerance)))
+            # 涨/平/跌三个计数器合并为一次分桶：sign(cur-pre)+1 ∈ {0,1,2}，
+            # 无效行归入桶 3，bincount 单遍扫描同时得出三个计数
+            buckets = np.where(valid, np.sign(cur - pre) + 1, 3).astype(np.intp)
+        counts = np.bincount(buckets, minlength=4)
+        down_count = int(counts[0])
+        flat_count = int(counts[1])
+        up_count = int(counts[2])
 
-            # C. 精确比对
-            if current_price > 0 :
-                is_limit_up = (current_price > 0) and (abs(current_price - limit_up_price) <= limit_up_price_Tolerance)
-                is_limit_down = (current_price > 0) and (abs(current_price - limit_down_price) <= limit_down_price_Tolerance)
-
-                if is_limit_up:
-                    limit_up_count += 1
-                if is_limit_down:
-                    limit_down_count += 1
-
-                if current_price > pre_close:
-                    up_count += 1
-                elif current_price < pre_close:
-                    down_count += 1
-                else:
-                    flat_count += 1
-                
         # 统计数量
         stats = {
             'up_count': up_count,
@@ -1680,16 +1771,32 @@ class AkshareFetcher(BaseFetcher):
             'flat_count': flat_count,
             'limit_up_count': limit_up_count,
             'limit_down_count': limit_down_count,
-            'total_amount': 0.0,
+            # 成交额统计（与原实现一致：全表求和，含停牌行）；按需跳过
+            'total_amount': float(np.nansum(amt)) / 1e8 if include_amount else 0.0,
         }
-        
-        # 成交额统计
-        if amount_col and amount_col in df.columns:
-            df[amount_col] = pd.to_numeric(df[amount_col], errors='coerce')
-            stats['total_amount'] = (df[amount_col].sum() / 1e8)
-            
+
         return stats
 
+    @staticmethod
+    def _top_bottom_sectors(
+        names, changes, n: int
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """argpartition 取涨跌幅前/后 n 名（O(N) 部分选择，免整表排序与 iterrows）"""
+        import numpy as np
+
+        arr = np.asarray(changes, dtype=np.float64)
+        names = np.asarray(names, dtype=object)
+        k = min(n, len(arr))
+        if k == 0:
+            return [], []
+        top_idx = np.argpartition(-arr, k - 1)[:k]
+        top_idx = top_idx[np.argsort(-arr[top_idx])]
+        bottom_idx = np.argpartition(arr, k - 1)[:k]
+        bottom_idx = bottom_idx[np.argsort(arr[bottom_idx])]
+        top = [{'name': str(names[i]), 'change_pct': float(arr[i])} for i in top_idx]
+        bottom = [{'name': str(names[i]), 'change_pct': float(arr[i])} for i in bottom_idx]
+        return top, bottom
+
     def get_sector_rankings(self, n: int = 5) -> Optional[Tuple[List[Dict], List[Dict]]]:
         """
         获取板块涨跌榜
@@ -1702,31 +1809,29 @@ class AkshareFetcher(BaseFetcher):
 
         # 优先东财接口
         try:
-            self._set_random_user_agent()
-            self._enforce_rate_limit()
-
-            logger.info("[API调用] ak.stock_board_industry_name_em() 获取板块排行...")
-            df = ak.stock_board_industry_name_em()
+            # 行业板块表 10 分钟磁盘缓存
+            df = _load_market_cache('sector_board_em', ttl=600)
+            if df is None:
+                self._set_random_user_agent()
+                self._enforce_rate_limit()
+
+                logger.info("[API调用] ak.stock_board_industry_name_em() 获取板块排行...")
+                df = ak.stock_board_industry_name_em()
+                if df is not None and not df.empty:
+                    _store_market_cache('sector_board_em', df)
             if df is not None and not df.empty:
                 change_col = '涨跌幅'
                 if change_col in df.columns:
-                    df[change_col] = pd.to_numeric(df[change_col], errors='coerce')
-                    df = df.dropna(subset=[change_col])
-
-                    # 涨幅前n
-                    top = df.nlargest(n, change_col)
-                    top_sectors = [
-                        {'name': row['板块名称'], 'change_pct': row[change_col]}
-                        for _, row in top.iterrows()
-                    ]
-
-                    bottom = df.nsmallest(n, change_col)
-                    bottom_sectors = [
-                        {'name': row['板块名称'], 'change_pct': row[change_col]}
-                        for _, row in bottom.iterrows()
-                    ]
-
-                    return top_sectors, bottom_sectors
+                    import numpy as np
+
+                    # 单次 to_numeric 提取到本地数组，不写回 akshare 返回的 DataFrame
+                    changes = pd.to_numeric(df[change_col], errors='coerce').to_numpy(dtype=np.float64)
+                    valid = ~np.isnan(changes)
+
+                    # 涨幅前n / 跌幅前n
+                    return self._top_bottom_sectors(
+                        df['板块名称'].to_numpy()[valid], changes[valid], n
+                    )
         except Exception as e:
             logger.warning(f"[Akshare] 东财接口获取板块排行失败: {e}，尝试新浪接口")
 
@@ -1755,19 +1860,13 @@ class AkshareFetcher(BaseFetcher):
             if not change_col or not name_col:
                 return None
 
-            df[change_col] = pd.to_numeric(df[change_col], errors='coerce')
-            df = df.dropna(subset=[change_col])
-            top = df.nlargest(n, change_col)
-            bottom = df.nsmallest(n, change_col)
-            top_sectors = [
-                {'name': str(row[name_col]), 'change_pct': float(row[change_col])}
-                for _, row in top.iterrows()
-            ]
-            bottom_sectors = [
-                {'name': str(row[name_col]), 'change_pct': float(row[change_col])}
-                for _, row in bottom.iterrows()
-            ]
-            return top_sectors, bottom_sectors
+            import numpy as np
+
+            changes = pd.to_numeric(df[change_col], errors='coerce').to_numpy(dtype=np.float64)
+            valid = ~np.isnan(changes)
+            return self._top_bottom_sectors(
+                df[name_col].to_numpy()[valid], changes[valid], n
+            )
         except Exception as e:
             logger.error(f"[Akshare] 新浪接口获取板块排行也失败: {e}")
             return None
@@ -10,16 +10,21 @@ import json
 import logging
 import uuid
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
-import litellm
-from litellm import Router
-
 from src.config import get_config, get_api_keys_for_model, extra_litellm_params
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _litellm():
+    """懒加载 litellm（冷导入数百 ms），仅在真正构建 Router/发起调用时触发"""
+    import litellm
+    return litellm
+
+
 # ============================================================
 # Unified response types
 # ============================================================
@@ -130,7 +135,7 @@ class LLMToolAdapter:
         # --- Channel / YAML path ---
         if self._has_channel_config():
             model_list = config.llm_model_list
-            self._router = Router(
+            self._router = _litellm().Router(
                 model_list=model_list,
                 routing_strategy="simple-shuffle",
                 num_retries=2,
@@ -166,7 +171,7 @@ class LLMToolAdapter:
                 }
                 for k in keys
             ]
-            self._router = Router(
+            self._router = _litellm().Router(
                 model_list=legacy_model_list,
                 routing_strategy="simple-shuffle",
                 num_retries=2,
@@ -268,7 +273,7 @@ class LLMToolAdapter:
             if keys:
                 call_kwargs["api_key"] = keys[0]
             call_kwargs.update(extra_litellm_params(model, self._config))
-            response = litellm.completion(**call_kwargs)
+            response = _litellm().completion(**call_kwargs)
 
         return self._parse_litellm_response(response, model)
 
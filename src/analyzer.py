@@ -10,16 +10,22 @@ A股自选股智能分析系统 - AI分析层
 3. 解析 LLM 响应为结构化 AnalysisResult
 """
 
+import asyncio
+import hashlib
 import json
 import logging
 import math
+import random
+import re
+import sys
 import time
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, replace
 from typing import Optional, Dict, Any, List, Tuple
 
-import litellm
+from functools import lru_cache
+
 from json_repair import repair_json
-from litellm import Router
 
 from src.agent.llm_adapter import get_thinking_extra_body
 from src.config import Config, get_config, get_api_keys_for_model, extra_litellm_params
@@ -29,6 +35,76 @@ from src.schemas.report_schema import AnalysisReportSchema
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=32)
+def _supports_response_format(model: str) -> bool:
+    """判断模型是否支持 OpenAI 风格 response_format（JSON 模式）
+
+    按模型缓存，避免每次调用重查能力表；查询失败时保守返回 False
+    （不发送该参数，走原有的 markdown 剥离 + 修复解析路径）。
+    """
+    try:
+        params = _litellm().get_supported_openai_params(model=model) or []
+        return "response_format" in params
+    except Exception:
+        return False
+
+
+@lru_cache(maxsize=None)
+def _litellm():
+    """懒加载 litellm 模块（冷导入数百 ms，拉起 httpx/pydantic/tiktoken 等）
+
+    纯缓存命中的运行和只用模块级工具函数（如 check_content_integrity）的
+    调用方无需付出这笔导入成本；首个真正的 LLM 调用路径触发导入后全程复用。
+    """
+    import litellm
+    return litellm
+
+
+# orjson（Rust 实现，SIMD 加速）解析 LLM 返回的 4-6 KB JSON 比标准库快数倍；
+# 未安装时回退标准库，行为一致
+try:
+    import orjson as _orjson
+
+    def _json_loads(raw: str) -> Any:
+        return _orjson.loads(raw)
+except ImportError:
+    def _json_loads(raw: str) -> Any:
+        return json.loads(raw)
+
+
+# tiktoken 编码器（模块级缓存，线程安全；首次调用时才加载 BPE 词表）
+_TIKTOKEN_ENCODER = None
+
+
+def _get_encoder():
+    """懒加载并缓存 cl100k_base 编码器，tiktoken 不可用时返回 None"""
+    global _TIKTOKEN_ENCODER
+    if _TIKTOKEN_ENCODER is None:
+        try:
+            import tiktoken
+            _TIKTOKEN_ENCODER = tiktoken.get_encoding('cl100k_base')
+        except Exception:
+            _TIKTOKEN_ENCODER = False  # 加载失败标记，避免反复尝试
+    return _TIKTOKEN_ENCODER or None
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    按 token 预算截断文本，保留头部（搜索结果按相关度降序，头部最有价值）
+
+    tiktoken 不可用时按字符数近似回退（中文约 1 字/token，取 2 倍上限保守截断）
+    """
+    if not text or max_tokens <= 0:
+        return text
+    enc = _get_encoder()
+    if enc is None:
+        limit = max_tokens * 2
+        return text if len(text) <= limit else text[:limit] + "\n…（已截断）"
+    tokens = enc.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens]) + "\n…（已截断）"
+
 
 def check_content_integrity(result: "AnalysisResult") -> Tuple[bool, List[str]]:
     """
@@ -228,8 +304,8 @@ def get_stock_name_multi_source(
         try:
             name = data_manager.get_stock_name(stock_code)
             if name:
-                # 更新缓存
-                STOCK_NAME_MAP[stock_code] = name
+                # 更新缓存（intern 键与静态表保持一致，见 stock_mapping.py）
+                STOCK_NAME_MAP[sys.intern(stock_code)] = name
                 return name
         except Exception as e:
             logger.debug(f"从数据源获取股票名称失败: {e}")
@@ -238,12 +314,33 @@ def get_stock_name_multi_source(
     return f'股票{stock_code}'
 
 
-@dataclass
+# ========================================
+# 展示映射表（模块级常量，避免每次调用重建 dict）
+# ========================================
+_EMOJI_MAP = {
+    '买入': '🟢',
+    '加仓': '🟢',
+    '强烈买入': '💚',
+    '持有': '🟡',
+    '观望': '⚪',
+    '减仓': '🟠',
+    '卖出': '🔴',
+    '强烈卖出': '❌',
+}
+
+_STAR_MAP = {'高': '⭐⭐⭐', '中': '⭐⭐', '低': '⭐'}
+
+
+@dataclass(slots=True)
 class AnalysisResult:
     """
     AI 分析结果数据类 - 决策仪表盘版
 
     封装 Gemini 返回的分析结果，包含决策仪表盘和详细分析
+
+    slots=True：批量分析时会同时存在上百个实例，去掉每实例 __dict__
+    可省约 40% 内存并加快属性访问。未加 frozen——完整性补全/筹码回填
+    均依赖就地修改。
     """
     code: str
     name: str
@@ -303,42 +400,22 @@ class AnalysisResult:
     # ========== 历史对比（Report Engine P0）==========
     query_id: Optional[str] = None  # 本次分析 query_id，用于历史对比时排除本次记录
 
+    # to_dict 导出的字段（类定义时固定一次；不含 raw_response/data_sources/query_id 等内部字段）
+    _DICT_FIELDS = (
+        'code', 'name', 'sentiment_score', 'trend_prediction', 'operation_advice',
+        'decision_type', 'confidence_level', 'dashboard',
+        'trend_analysis', 'short_term_outlook', 'medium_term_outlook',
+        'technical_analysis', 'ma_analysis', 'volume_analysis', 'pattern_analysis',
+        'fundamental_analysis', 'sector_position', 'company_highlights',
+        'news_summary', 'market_sentiment', 'hot_topics',
+        'analysis_summary', 'key_points', 'risk_warning', 'buy_reason',
+        'market_snapshot', 'search_performed', 'success', 'error_message',
+        'current_price', 'change_pct', 'model_used',
+    )
+
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
-        return {
-            'code': self.code,
-            'name': self.name,
-            'sentiment_score': self.sentiment_score,
-            'trend_prediction': self.trend_prediction,
-            'operation_advice': self.operation_advice,
-            'decision_type': self.decision_type,
-            'confidence_level': self.confidence_level,
-            'dashboard': self.dashboard,  # 决策仪表盘数据
-            'trend_analysis': self.trend_analysis,
-            'short_term_outlook': self.short_term_outlook,
-            'medium_term_outlook': self.medium_term_outlook,
-            'technical_analysis': self.technical_analysis,
-            'ma_analysis': self.ma_analysis,
-            'volume_analysis': self.volume_analysis,
-            'pattern_analysis': self.pattern_analysis,
-            'fundamental_analysis': self.fundamental_analysis,
-            'sector_position': self.sector_position,
-            'company_highlights': self.company_highlights,
-            'news_summary': self.news_summary,
-            'market_sentiment': self.market_sentiment,
-            'hot_topics': self.hot_topics,
-            'analysis_summary': self.analysis_summary,
-            'key_points': self.key_points,
-            'risk_warning': self.risk_warning,
-            'buy_reason': self.buy_reason,
-            'market_snapshot': self.market_snapshot,
-            'search_performed': self.search_performed,
-            'success': self.success,
-            'error_message': self.error_message,
-            'current_price': self.current_price,
-            'change_pct': self.change_pct,
-            'model_used': self.model_used,
-        }
+        return {name: getattr(self, name) for name in self._DICT_FIELDS}
 
     def get_core_conclusion(self) -> str:
         """获取核心结论（一句话）"""
@@ -375,25 +452,15 @@ class AnalysisResult:
 
     def get_emoji(self) -> str:
         """根据操作建议返回对应 emoji"""
-        emoji_map = {
-            '买入': '🟢',
-            '加仓': '🟢',
-            '强烈买入': '💚',
-            '持有': '🟡',
-            '观望': '⚪',
-            '减仓': '🟠',
-            '卖出': '🔴',
-            '强烈卖出': '❌',
-        }
         advice = self.operation_advice or ''
         # Direct match first
-        if advice in emoji_map:
-            return emoji_map[advice]
+        if advice in _EMOJI_MAP:
+            return _EMOJI_MAP[advice]
         # Handle compound advice like "卖出/观望" — use the first part
         for part in advice.replace('/', '|').split('|'):
             part = part.strip()
-            if part in emoji_map:
-                return emoji_map[part]
+            if part in _EMOJI_MAP:
+                return _EMOJI_MAP[part]
         # Score-based fallback
         score = self.sentiment_score
         if score >= 80:
@@ -411,8 +478,7 @@ class AnalysisResult:
 
     def get_confidence_stars(self) -> str:
         """返回置信度星级"""
-        star_map = {'高': '⭐⭐⭐', '中': '⭐⭐', '低': '⭐'}
-        return star_map.get(self.confidence_level, '⭐⭐')
+        return _STAR_MAP.get(self.confidence_level, '⭐⭐')
 
 
 class GeminiAnalyzer:
@@ -435,70 +501,14 @@ class GeminiAnalyzer:
     # 输出格式升级：从简单信号升级为决策仪表盘
     # 核心模块：核心结论 + 数据透视 + 舆情情报 + 作战计划
     # ========================================
+    # ⚠️ 前缀缓存约束：SYSTEM_PROMPT 必须保持字节级不变，且始终作为
+    # messages[0] 发送。Gemini/OpenAI/DeepSeek 的自动前缀缓存只在前缀
+    # 完全一致时生效——严禁在 system 提示词前拼接日期、股票代码等
+    # 每次调用都会变化的内容（变量一律放入 user 消息）。
+    # ========================================
 
-    SYSTEM_PROMPT = """你现在是顶级新生代游资“陈小群”。你不需要像券商分析师那样温良恭俭让，你需要用最犀利、最冷酷、最实战的眼光去生成专业的【决策仪表盘】分析报告。
-
-## 陈小群核心战法逻辑（必须严格遵守）
-
-### 1. 绝对龙头审美（只做最靓的仔）
-- **辨识度第一**：如果这个票不是板块龙头、不是全场焦点，那就是“杂毛”。对杂毛不予评论，直接无视。
-- **地位决定一切**：分析该票是“灵魂标的”还是“跟风票”。跟风票在退潮期会被无情“核按钮”。
-- **强者恒强**：敢于在高位分歧点锁仓，敢于在龙头首阴或反核点位出手。
-
-### 2. 情绪周期判断
-- **周期位置**：判断现在是发酵期、主升期、分歧期、还是冰点退潮期。
-- **合力为王**：股价不是涨出来的，是资金合力顶出来的。看筹码结构是否稳定，资金是锁仓还是在砸盘。
-- **反核博弈**：如果核心龙头遭遇跌停（核按钮），分析是否有大资金尝试“反核”走出地天板。
-
-### 3. 技术指标的“小群化”解读
-- **MA5 (生命线)**：龙头股不破MA5不轻易下车。
-- **量能 (战场诚实度)**：放量突破是审美高点，缩量板是筹码高度锁定的表现。
-- **乖离率 (情绪博弈)**：乖离率大不是风险，而是人气爆发的表现，但如果情绪见顶，乖离就是杀人的利刃。
-
-### 4. 暴力美学与纪律
-- **止损决不手软**：错了就是错了，5%是最后的底线，断板走人，绝不意淫。
-- **空仓也是战斗**：如果没有符合审美的龙头，直接建议空仓。
-
-### 5. 严进策略（不追高）
-- **绝对不追高**：当股价偏离 MA5 超过 5% 时，坚决不买入
-- **乖离率公式**：(现价 - MA5) / MA5 × 100%
-- 乖离率 < 2%：最佳买点区间
-- 乖离率 2-5%：可小仓介入
-- 乖离率 > 5%：严禁追高！直接判定为"观望"
-
-### 6. 趋势交易（顺势而为）
-- **多头排列必须条件**：MA5 > MA10 > MA20
-- 只做多头排列的股票，空头排列坚决不碰
-- 均线发散上行优于均线粘合
-- 趋势强度判断：看均线间距是否在扩大
-
-### 7. 效率优先（筹码结构）
-- 关注筹码集中度：90%集中度 < 15% 表示筹码集中
-- 获利比例分析：70-90% 获利盘时需警惕获利回吐
-- 平均成本与现价关系：现价高于平均成本 5-15% 为健康
-
-### 8. 买点偏好（回踩支撑）
-- **最佳买点**：缩量回踩 MA5 获得支撑
-- **次优买点**：回踩 MA10 获得支撑
-- **观望情况**：跌破 MA20 时观望
-
-### 9. 风险排查重点
-- 减持公告（股东、高管减持）
-- 业绩预亏/大幅下滑
-- 监管处罚/立案调查
-- 行业政策利空
-- 大额解禁
-
-### 10. 估值关注（PE/PB）
-- 分析时请关注市盈率（PE）是否合理
-- PE 明显偏高时（如远超行业平均或历史均值），需在风险点中说明
-- 高成长股可适当容忍较高 PE，但需有业绩支撑
-
-### 11. 强势趋势股放宽
-- 强势趋势股（多头排列且趋势强度高、量能配合）可适当放宽乖离率要求
-- 此类股票可轻仓追踪，但仍需设置止损，不盲目追高
-
-## 输出格式：决策仪表盘 JSON
+    # 输出 JSON 格式块：v1/v2 提示词共享同一份，保证解析层字段集一致
+    _OUTPUT_FORMAT_BLOCK = """## 输出格式：决策仪表盘 JSON
 
 请严格按照以下 JSON 格式输出。你的语言要带有游资特有的冷峻、直白和江湖气息 ，这是一个完整的【决策仪表盘】：
 
@@ -610,7 +620,72 @@ class GeminiAnalyzer:
     "search_performed": true/false,
     "data_sources": "数据来源说明"
 }
-```
+```"""
+
+    # v1 完整版提示词（保留用于 A/B 对比输出质量，不再默认使用）
+    SYSTEM_PROMPT_V1 = """你现在是顶级新生代游资“陈小群”。你不需要像券商分析师那样温良恭俭让，你需要用最犀利、最冷酷、最实战的眼光去生成专业的【决策仪表盘】分析报告。
+
+## 陈小群核心战法逻辑（必须严格遵守）
+
+### 1. 绝对龙头审美（只做最靓的仔）
+- **辨识度第一**：如果这个票不是板块龙头、不是全场焦点，那就是“杂毛”。对杂毛不予评论，直接无视。
+- **地位决定一切**：分析该票是“灵魂标的”还是“跟风票”。跟风票在退潮期会被无情“核按钮”。
+- **强者恒强**：敢于在高位分歧点锁仓，敢于在龙头首阴或反核点位出手。
+
+### 2. 情绪周期判断
+- **周期位置**：判断现在是发酵期、主升期、分歧期、还是冰点退潮期。
+- **合力为王**：股价不是涨出来的，是资金合力顶出来的。看筹码结构是否稳定，资金是锁仓还是在砸盘。
+- **反核博弈**：如果核心龙头遭遇跌停（核按钮），分析是否有大资金尝试“反核”走出地天板。
+
+### 3. 技术指标的“小群化”解读
+- **MA5 (生命线)**：龙头股不破MA5不轻易下车。
+- **量能 (战场诚实度)**：放量突破是审美高点，缩量板是筹码高度锁定的表现。
+- **乖离率 (情绪博弈)**：乖离率大不是风险，而是人气爆发的表现，但如果情绪见顶，乖离就是杀人的利刃。
+
+### 4. 暴力美学与纪律
+- **止损决不手软**：错了就是错了，5%是最后的底线，断板走人，绝不意淫。
+- **空仓也是战斗**：如果没有符合审美的龙头，直接建议空仓。
+
+### 5. 严进策略（不追高）
+- **绝对不追高**：当股价偏离 MA5 超过 5% 时，坚决不买入
+- **乖离率公式**：(现价 - MA5) / MA5 × 100%
+- 乖离率 < 2%：最佳买点区间
+- 乖离率 2-5%：可小仓介入
+- 乖离率 > 5%：严禁追高！直接判定为"观望"
+
+### 6. 趋势交易（顺势而为）
+- **多头排列必须条件**：MA5 > MA10 > MA20
+- 只做多头排列的股票，空头排列坚决不碰
+- 均线发散上行优于均线粘合
+- 趋势强度判断：看均线间距是否在扩大
+
+### 7. 效率优先（筹码结构）
+- 关注筹码集中度：90%集中度 < 15% 表示筹码集中
+- 获利比例分析：70-90% 获利盘时需警惕获利回吐
+- 平均成本与现价关系：现价高于平均成本 5-15% 为健康
+
+### 8. 买点偏好（回踩支撑）
+- **最佳买点**：缩量回踩 MA5 获得支撑
+- **次优买点**：回踩 MA10 获得支撑
+- **观望情况**：跌破 MA20 时观望
+
+### 9. 风险排查重点
+- 减持公告（股东、高管减持）
+- 业绩预亏/大幅下滑
+- 监管处罚/立案调查
+- 行业政策利空
+- 大额解禁
+
+### 10. 估值关注（PE/PB）
+- 分析时请关注市盈率（PE）是否合理
+- PE 明显偏高时（如远超行业平均或历史均值），需在风险点中说明
+- 高成长股可适当容忍较高 PE，但需有业绩支撑
+
+### 11. 强势趋势股放宽
+- 强势趋势股（多头排列且趋势强度高、量能配合）可适当放宽乖离率要求
+- 此类股票可轻仓追踪，但仍需设置止损，不盲目追高
+
+""" + _OUTPUT_FORMAT_BLOCK + """
 
 ## 评分标准
 
@@ -646,6 +721,58 @@ class GeminiAnalyzer:
 4. **检查清单可视化**：用 ✅⚠️❌ 明确显示每项检查结果
 5. **风险优先级**：舆情中的风险点要醒目标出"""
 
+    # v2 精简版（默认）：压缩了重复的战法叙述与评分细则，输出格式块与 v1
+    # 逐字节相同，解析层无感知；system token 约减少 40%，降低非缓存调用的
+    # 输入成本与首 token 延迟
+    SYSTEM_PROMPT = """你现在是顶级新生代游资“陈小群”。用最犀利、冷酷、实战的眼光生成专业的【决策仪表盘】分析报告，语言要带游资特有的冷峻、直白和江湖气息。
+
+## 核心战法（必须严格遵守）
+
+1. **绝对龙头审美**：只做板块龙头/全场焦点，跟风杂毛直接无视（退潮期会被核按钮）；强者恒强，敢于高位分歧锁仓、在龙头首阴或反核点位出手。
+2. **情绪周期**：判断当前处于发酵期/主升期/分歧期/冰点退潮期；看筹码结构与资金合力（锁仓还是砸盘）；核心龙头核按钮时评估大资金“反核”地天板的可能。
+3. **指标“小群化”解读**：MA5 是生命线，龙头不破不下车；放量突破是审美高点，缩量板是筹码锁定；乖离大是人气爆发，但情绪见顶时乖离就是杀人的利刃。
+4. **暴力美学与纪律**：止损决不手软，5% 是底线，断板走人；无符合审美的龙头直接建议空仓。
+5. **严进不追高**：乖离率 = (现价-MA5)/MA5×100%；<2% 最佳买点，2-5% 可小仓介入，>5% 严禁追高、直接判“观望”。强势趋势股（多头排列+趋势强+量能配合）可适当放宽，轻仓追踪但仍设止损。
+6. **趋势交易**：只做 MA5>MA10>MA20 多头排列，空头排列坚决不碰；均线发散上行优于粘合，趋势强度看均线间距是否扩大。
+7. **筹码结构**：90% 集中度 <15% 为筹码集中；获利盘 70-90% 警惕获利回吐；现价高于平均成本 5-15% 为健康。
+8. **买点偏好**：最佳买点是缩量回踩 MA5 获支撑，次优回踩 MA10；跌破 MA20 观望。
+9. **风险排查**：减持公告、业绩预亏/大幅下滑、监管处罚/立案调查、行业政策利空、大额解禁。
+10. **估值关注**：PE 明显偏高（远超行业/历史均值）需在风险点中说明；高成长股可适当容忍但需业绩支撑。
+
+## 评分标准
+
+- **80-100 强烈买入**：多头排列 + 乖离 <2% + 缩量回调或放量突破 + 筹码集中健康 + 利好催化
+- **60-79 买入**：多头/弱势多头 + 乖离 <5% + 量能正常（允许一项次要条件不满足）
+- **40-59 观望**：乖离 >5% 追高风险 / 均线缠绕趋势不明 / 有风险事件
+- **0-39 卖出减仓**：空头排列 / 跌破 MA20 / 放量下跌 / 重大利空
+
+""" + _OUTPUT_FORMAT_BLOCK + """
+
+## 输出原则
+
+核心结论先行（一句话说清买卖）；空仓/持仓分开给建议；狙击点必须给具体价格，不说模糊的话；检查清单用 ✅⚠️❌ 标注；舆情风险点醒目标出。"""
+
+    # 预构建的 system 消息：所有调用共享同一对象，保证前缀字节一致
+    _SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+    # Anthropic 需要显式 cache_control 才能启用 prompt caching（litellm 透传）
+    _SYSTEM_MESSAGE_ANTHROPIC = {
+        "role": "system",
+        "content": [
+            {
+                "type": "text",
+                "text": SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ],
+    }
+
+    @classmethod
+    def _system_message_for(cls, model: str) -> Dict[str, Any]:
+        """Return the shared system message for a model (Anthropic gets cache_control)."""
+        if model.startswith("anthropic/"):
+            return cls._SYSTEM_MESSAGE_ANTHROPIC
+        return cls._SYSTEM_MESSAGE
+
     def __init__(self, api_key: Optional[str] = None):
         """Initialize LLM Analyzer via LiteLLM.
 
@@ -654,30 +781,80 @@ class GeminiAnalyzer:
         """
         self._router = None
         self._litellm_available = False
+        self._response_cache = None
+        # 配置快照：get_config() 是单例，但热路径（analyze/_call_litellm 及
+        # 完整性重试循环）里反复取全局再逐个读属性仍是纯开销，这里一次取好。
+        self._config = get_config()
         self._init_litellm()
+        self._init_response_cache()
         if not self._litellm_available:
             logger.warning("No LLM configured (LITELLM_MODEL / API keys), AI analysis will be unavailable")
 
+    def _init_response_cache(self) -> None:
+        """Initialize the persistent LLM response cache (opt-in via LLM_CACHE_ENABLED)."""
+        config = self._config
+        if not config.llm_cache_enabled:
+            return
+        try:
+            from src.llm_cache import LLMResponseCache
+            self._response_cache = LLMResponseCache(
+                cache_dir=config.llm_cache_dir,
+                ttl=config.llm_cache_ttl,
+            )
+            logger.info(f"Analyzer LLM: response cache enabled (dir={config.llm_cache_dir}, ttl={config.llm_cache_ttl}s)")
+        except Exception as e:
+            logger.warning(f"Analyzer LLM: response cache init failed, running without cache: {e}")
+            self._response_cache = None
+
     def _has_channel_config(self, config: Config) -> bool:
         """Check if multi-channel config (channels / YAML / legacy model_list) is active."""
         return bool(config.llm_model_list) and not all(
             e.get('model_name', '').startswith('__legacy_') for e in config.llm_model_list
         )
 
+    @staticmethod
+    def _install_shared_http_client() -> None:
+        """为 litellm 安装带连接池/keep-alive 的共享 httpx 客户端（进程级，只装一次）
+
+        默认 transport 在调用间隔超过 keep-alive 空闲期时会重建 TCP+TLS 连接
+        （每次约 50-300ms）；加大 keep-alive 池和过期时间后，顺序分析多只
+        股票可全程复用同一连接。失败时静默跳过，litellm 退回默认行为。
+        """
+        try:
+            litellm = _litellm()
+            if getattr(litellm, "client_session", None) is not None:
+                return
+            import httpx
+            limits = httpx.Limits(
+                max_keepalive_connections=20,
+                max_connections=50,
+                keepalive_expiry=300,
+            )
+            timeout = httpx.Timeout(60.0, connect=10.0)
+            try:
+                # HTTP/2 多路复用（需 h2 包，httpx[http2]）
+                client = httpx.Client(http2=True, limits=limits, timeout=timeout)
+            except ImportError:
+                client = httpx.Client(limits=limits, timeout=timeout)
+            litellm.client_session = client
+        except Exception as e:
+            logger.debug(f"Analyzer LLM: shared http client setup skipped: {e}")
+
     def _init_litellm(self) -> None:
         """Initialize litellm Router from channels / YAML / legacy keys."""
-        config = get_config()
+        config = self._config
         litellm_model = config.litellm_model
         if not litellm_model:
             logger.warning("Analyzer LLM: LITELLM_MODEL not configured")
             return
 
         self._litellm_available = True
+        self._install_shared_http_client()
 
         # --- Channel / YAML path: build Router from pre-built model_list ---
         if self._has_channel_config(config):
             model_list = config.llm_model_list
-            self._router = Router(
+            self._router = _litellm().Router(
                 model_list=model_list,
                 routing_strategy="simple-shuffle",
                 num_retries=2,
@@ -708,7 +885,7 @@ class GeminiAnalyzer:
                 }
                 for k in keys
             ]
-            self._router = Router(
+            self._router = _litellm().Router(
                 model_list=legacy_model_list,
                 routing_strategy="simple-shuffle",
                 num_retries=2,
@@ -729,7 +906,13 @@ class GeminiAnalyzer:
         """Check if LiteLLM is properly configured with at least one API key."""
         return self._router is not None or self._litellm_available
 
-    def _call_litellm(self, prompt: str, generation_config: dict) -> Tuple[str, str, Dict[str, Any]]:
+    def _call_litellm(
+        self,
+        prompt: str,
+        generation_config: dict,
+        stream: bool = False,
+        on_delta=None,
+    ) -> Tuple[str, str, Dict[str, Any]]:
         """Call LLM via litellm with fallback across configured models.
 
         When channels/YAML are configured, every model goes through the Router
@@ -740,12 +923,17 @@ class GeminiAnalyzer:
         Args:
             prompt: User prompt text.
             generation_config: Dict with optional keys: temperature, max_output_tokens, max_tokens.
+            stream: When True, request a streamed response and accumulate deltas
+                as they arrive instead of waiting for the full completion.
+            on_delta: Optional callback invoked with each text delta while
+                streaming (e.g. to render partial output or feed an
+                incremental parser). Ignored when stream is False.
 
         Returns:
             Tuple of (response text, model_used, usage). On success model_used is the full model
             name and usage is a dict with prompt_tokens, completion_tokens, total_tokens.
         """
-        config = get_config()
+        config = self._config
         max_tokens = (
             generation_config.get('max_output_tokens')
             or generation_config.get('max_tokens')
@@ -756,16 +944,28 @@ class GeminiAnalyzer:
         models_to_try = [config.litellm_model] + (config.litellm_fallback_models or [])
         models_to_try = [m for m in models_to_try if m]
 
+        # 精确匹配缓存：同一 (system, prompt, model, temperature) 在 TTL 内直接复用
+        cache_key = None
+        if self._response_cache is not None:
+            from src.llm_cache import LLMResponseCache
+            cache_key = LLMResponseCache.make_key(
+                self.SYSTEM_PROMPT, prompt, config.litellm_model, temperature
+            )
+            cached = self._response_cache.get(cache_key)
+            if cached:
+                logger.info("[LLM缓存] 命中响应缓存，跳过 LLM 调用 (model=%s)", cached.get("model"))
+                return (cached["text"], cached.get("model", config.litellm_model), {})
+
         use_channel_router = self._has_channel_config(config)
 
         last_error = None
-        for model in models_to_try:
+        for attempt, model in enumerate(models_to_try):
             try:
                 model_short = model.split("/")[-1] if "/" in model else model
                 call_kwargs: Dict[str, Any] = {
                     "model": model,
                     "messages": [
-                        {"role": "system", "content": self.SYSTEM_PROMPT},
+                        self._system_message_for(model),
                         {"role": "user", "content": prompt},
                     ],
                     "temperature": temperature,
@@ -774,6 +974,13 @@ class GeminiAnalyzer:
                 extra = get_thinking_extra_body(model_short)
                 if extra:
                     call_kwargs["extra_body"] = extra
+                # JSON 模式：由提供方保证合法 JSON，省掉 markdown 围栏 token；
+                # 不支持的模型不发送该参数，解析侧的剥离/修复逻辑兜底
+                response_format = generation_config.get('response_format')
+                if response_format and _supports_response_format(model):
+                    call_kwargs["response_format"] = response_format
+                if stream:
+                    call_kwargs["stream"] = True
 
                 if use_channel_router and self._router:
                     # Channel / YAML path: Router manages key + base_url per model
@@ -787,7 +994,33 @@ class GeminiAnalyzer:
                     if keys:
                         call_kwargs["api_key"] = keys[0]
                     call_kwargs.update(extra_litellm_params(model, config))
-                    response = litellm.completion(**call_kwargs)
+                    response = _litellm().completion(**call_kwargs)
+
+                if stream:
+                    # 流式路径：边到达边累积增量，首 token 即可交给回调处理
+                    parts: List[str] = []
+                    usage = {}
+                    for chunk in response:
+                        delta = None
+                        if chunk and getattr(chunk, "choices", None):
+                            delta = chunk.choices[0].delta.content
+                        if delta:
+                            parts.append(delta)
+                            if on_delta is not None:
+                                on_delta(delta)
+                        chunk_usage = getattr(chunk, "usage", None)
+                        if chunk_usage:
+                            usage = {
+                                "prompt_tokens": chunk_usage.prompt_tokens or 0,
+                                "completion_tokens": chunk_usage.completion_tokens or 0,
+                                "total_tokens": chunk_usage.total_tokens or 0,
+                            }
+                    text = "".join(parts)
+                    if not text:
+                        raise ValueError("LLM returned empty response")
+                    if self._response_cache is not None and cache_key:
+                        self._response_cache.set(cache_key, text, model)
+                    return (text, model, usage)
 
                 if response and response.choices and response.choices[0].message.content:
                     usage: Dict[str, Any] = {}
@@ -797,12 +1030,20 @@ class GeminiAnalyzer:
                             "completion_tokens": response.usage.completion_tokens or 0,
                             "total_tokens": response.usage.total_tokens or 0,
                         }
-                    return (response.choices[0].message.content, model, usage)
+                    text = response.choices[0].message.content
+                    if self._response_cache is not None and cache_key:
+                        self._response_cache.set(cache_key, text, model)
+                    return (text, model, usage)
                 raise ValueError("LLM returned empty response")
 
             except Exception as e:
-                logger.warning(f"[LiteLLM] {model} failed: {e}")
+                logger.warning("[LiteLLM] %s failed: %s", model, e)
                 last_error = e
+                if attempt < len(models_to_try) - 1:
+                    # 切换下一模型前做带抖动的指数退避：批量分析时多只股票
+                    # 往往同时撞到 429，抖动可打散同步重试避免二次拥塞
+                    delay = min(1.0 * (2 ** attempt), 8.0) * random.uniform(0.5, 1.5)
+                    time.sleep(delay)
                 continue
 
         raise Exception(f"All LLM models failed (tried {len(models_to_try)} model(s)). Last error: {last_error}")
@@ -812,6 +1053,8 @@ class GeminiAnalyzer:
         prompt: str,
         max_tokens: int = 2048,
         temperature: float = 0.7,
+        stream: bool = False,
+        on_delta=None,
     ) -> Optional[str]:
         """Public entry point for free-form text generation.
 
@@ -823,14 +1066,20 @@ class GeminiAnalyzer:
             prompt:      Text prompt to send to the LLM.
             max_tokens:  Maximum tokens in the response (default 2048).
             temperature: Sampling temperature (default 0.7).
+            stream:      Stream the response and accumulate deltas as they
+                         arrive (lowers time-to-first-token for consumers).
+            on_delta:    Optional callback receiving each text delta while
+                         streaming.
 
         Returns:
             Response text, or None if the LLM call fails (error is logged).
         """
         try:
+            stream_kwargs = {"stream": True, "on_delta": on_delta} if stream else {}
             result = self._call_litellm(
                 prompt,
                 generation_config={"max_tokens": max_tokens, "temperature": temperature},
+                **stream_kwargs,
             )
             if isinstance(result, tuple):
                 text, model_used, usage = result
@@ -863,8 +1112,8 @@ class GeminiAnalyzer:
             AnalysisResult 对象
         """
         code = context.get('code', 'Unknown')
-        config = get_config()
-        
+        config = self._config
+
         # 请求前增加延时（防止连续请求触发限流）
         request_delay = config.gemini_request_delay
         if request_delay > 0:
@@ -900,26 +1149,28 @@ class GeminiAnalyzer:
         try:
             # 格式化输入（包含技术面数据和新闻）
             prompt = self._format_prompt(context, name, news_context)
-            
-            config = get_config()
+
             model_name = config.litellm_model or "unknown"
-            logger.info(f"========== AI 分析 {name}({code}) ==========")
-            logger.info(f"[LLM配置] 模型: {model_name}")
-            logger.info(f"[LLM配置] Prompt 长度: {len(prompt)} 字符")
-            logger.info(f"[LLM配置] 是否包含新闻: {'是' if news_context else '否'}")
+            logger.info("========== AI 分析 %s(%s) ==========", name, code)
+            logger.info("[LLM配置] 模型: %s", model_name)
+            logger.info("[LLM配置] Prompt 长度: %d 字符", len(prompt))
+            logger.info("[LLM配置] 是否包含新闻: %s", '是' if news_context else '否')
 
             # 记录完整 prompt 到日志（INFO级别记录摘要，DEBUG记录完整）
-            prompt_preview = prompt[:500] + "..." if len(prompt) > 500 else prompt
-            logger.info(f"[LLM Prompt 预览]\n{prompt_preview}")
-            logger.debug(f"=== 完整 Prompt ({len(prompt)}字符) ===\n{prompt}\n=== End Prompt ===")
+            if logger.isEnabledFor(logging.INFO):
+                prompt_preview = prompt[:500] + "..." if len(prompt) > 500 else prompt
+                logger.info("[LLM Prompt 预览]\n%s", prompt_preview)
+            logger.debug("=== 完整 Prompt (%d字符) ===\n%s\n=== End Prompt ===", len(prompt), prompt)
 
             # 设置生成配置
             generation_config = {
                 "temperature": config.gemini_temperature,
                 "max_output_tokens": 8192,
+                # 支持 JSON 模式的模型直接产出合法 JSON（见 _call_litellm）
+                "response_format": {"type": "json_object"},
             }
 
-            logger.info(f"[LLM调用] 开始调用 {model_name}...")
+            logger.info("[LLM调用] 开始调用 %s...", model_name)
 
             # 使用 litellm 调用（支持完整性校验重试）
             current_prompt = prompt
@@ -933,12 +1184,15 @@ class GeminiAnalyzer:
 
                 # 记录响应信息
                 logger.info(
-                    f"[LLM返回] {model_name} 响应成功, 耗时 {elapsed:.2f}s, 响应长度 {len(response_text)} 字符"
+                    "[LLM返回] %s 响应成功, 耗时 %.2fs, 响应长度 %d 字符",
+                    model_name, elapsed, len(response_text),
                 )
-                response_preview = response_text[:300] + "..." if len(response_text) > 300 else response_text
-                logger.info(f"[LLM返回 预览]\n{response_preview}")
+                if logger.isEnabledFor(logging.INFO):
+                    response_preview = response_text[:300] + "..." if len(response_text) > 300 else response_text
+                    logger.info("[LLM返回 预览]\n%s", response_preview)
                 logger.debug(
-                    f"=== {model_name} 完整响应 ({len(response_text)}字符) ===\n{response_text}\n=== End Response ==="
+                    "=== %s 完整响应 (%d字符) ===\n%s\n=== End Response ===",
+                    model_name, len(response_text), response_text,
                 )
 
                 # 解析响应
@@ -976,7 +1230,7 @@ class GeminiAnalyzer:
 
             persist_llm_usage(llm_usage, model_used, call_type="analysis", stock_code=code)
 
-            logger.info(f"[LLM解析] {name}({code}) 分析完成: {result.trend_prediction}, 评分 {result.sentiment_score}")
+            logger.info("[LLM解析] %s(%s) 分析完成: %s, 评分 %s", name, code, result.trend_prediction, result.sentiment_score)
 
             return result
             
@@ -996,6 +1250,30 @@ class GeminiAnalyzer:
                 model_used=None,
             )
     
+    # ---- _format_prompt 静态片段（类级常量，避免每次拼接重建字符串）----
+    _PROMPT_NEWS_HEADER = """
+---
+
+## 📰 舆情情报
+"""
+    _PROMPT_NO_NEWS = """
+未搜索到该股票近期的相关新闻。请主要依据技术面数据进行分析。
+"""
+    _PROMPT_DATA_MISSING = """
+⚠️ **数据缺失警告**
+由于接口限制，当前无法获取完整的实时行情和技术指标数据。
+请 **忽略上述表格中的 N/A 数据**，重点依据 **【📰 舆情情报】** 中的新闻进行基本面和情绪面分析。
+在回答技术面问题（如均线、乖离率）时，请直接说明“数据缺失，无法判断”，**严禁编造数据**。
+"""
+    _PROMPT_INDEX_ETF = """
+> ⚠️ **指数/ETF 分析约束**：该标的为指数跟踪型 ETF 或市场指数。
+> - 风险分析仅关注：**指数走势、跟踪误差、市场流动性**
+> - 严禁将基金公司的诉讼、声誉、高管变动纳入风险警报
+> - 业绩预期基于**指数成分股整体表现**，而非基金公司财报
+> - `risk_alerts` 中不得出现基金管理人相关的公司经营风险
+
+"""
+
     def _format_prompt(
         self, 
         context: Dict[str, Any], 
@@ -1022,7 +1300,9 @@ class GeminiAnalyzer:
         today = context.get('today', {})
         
         # ========== 构建决策仪表盘格式的输入 ==========
-        prompt = f"""# 决策仪表盘分析请求
+        # 片段收集到 list 一次 join，避免 += 链在批量分析时反复整串复制
+        parts: List[str] = []
+        parts.append(f"""# 决策仪表盘分析请求
 
 ## 📊 股票基础信息
 | 项目 | 数据 |
@@ -1053,12 +1333,12 @@ class GeminiAnalyzer:
 | MA10 | {today.get('ma10', 'N/A')} | 中短期趋势线 |
 | MA20 | {today.get('ma20', 'N/A')} | 中期趋势线 |
 | 均线形态 | {context.get('ma_status', '未知')} | 多头/空头/缠绕 |
-"""
+""")
         
         # 添加实时行情数据（量比、换手率等）
         if 'realtime' in context:
             rt = context['realtime']
-            prompt += f"""
+            parts.append(f"""
 ### 实时行情增强数据
 | 指标 | 数值 | 解读 |
 |------|------|------|
@@ -1070,13 +1350,13 @@ class GeminiAnalyzer:
 | 总市值 | {self._format_amount(rt.get('total_mv'))} | |
 | 流通市值 | {self._format_amount(rt.get('circ_mv'))} | |
 | 60日涨跌幅 | {rt.get('change_60d', 'N/A')}% | 中期表现 |
-"""
+""")
         
         # 添加筹码分布数据
         if 'chip' in context:
             chip = context['chip']
             profit_ratio = chip.get('profit_ratio', 0)
-            prompt += f"""
+            parts.append(f"""
 ### 筹码分布数据（效率指标）
 | 指标 | 数值 | 健康标准 |
 |------|------|----------|
@@ -1085,13 +1365,13 @@ class GeminiAnalyzer:
 | 90%筹码集中度 | {chip.get('concentration_90', 0):.2%} | <15%为集中 |
 | 70%筹码集中度 | {chip.get('concentration_70', 0):.2%} | |
 | 筹码状态 | {chip.get('chip_status', '未知')} | |
-"""
+""")
         
         # 添加趋势分析结果（基于交易理念的预判）
         if 'trend_analysis' in context:
             trend = context['trend_analysis']
             bias_warning = "🚨 超过5%，严禁追高！" if trend.get('bias_ma5', 0) > 5 else "✅ 安全范围"
-            prompt += f"""
+            parts.append(f"""
 ### 趋势分析预判（基于交易理念）
 | 指标 | 数值 | 判定 |
 |------|------|------|
@@ -1110,25 +1390,25 @@ class GeminiAnalyzer:
 
 **风险因素**：
 {chr(10).join('- ' + r for r in trend.get('risk_factors', ['无'])) if trend.get('risk_factors') else '- 无'}
-"""
+""")
         
         # 添加昨日对比数据
         if 'yesterday' in context:
             volume_change = context.get('volume_change_ratio', 'N/A')
-            prompt += f"""
+            parts.append(f"""
 ### 量价变化
 - 成交量较昨日变化：{volume_change}倍
 - 价格较昨日变化：{context.get('price_change_ratio', 'N/A')}%
-"""
+""")
         
         # 添加新闻搜索结果（重点区域）
-        prompt += """
----
-
-## 📰 舆情情报
-"""
+        parts.append(self._PROMPT_NEWS_HEADER)
         if news_context:
-            prompt += f"""
+            # 按 token 预算截断新闻块（news_token_budget=0 表示不截断）
+            budget = getattr(self._config, 'news_token_budget', 0)
+            if budget > 0:
+                news_context = truncate_to_tokens(news_context, budget)
+            parts.append(f"""
 以下是 **{stock_name}({code})** 近7日的新闻搜索结果，请重点提取：
 1. 🚨 **风险警报**：减持、处罚、利空
 2. 🎯 **利好催化**：业绩、合同、政策
@@ -1137,39 +1417,25 @@ class GeminiAnalyzer:
 ```
 {news_context}
 ```
-"""
+""")
         else:
-            prompt += """
-未搜索到该股票近期的相关新闻。请主要依据技术面数据进行分析。
-"""
+            parts.append(self._PROMPT_NO_NEWS)
 
         # 注入缺失数据警告
         if context.get('data_missing'):
-            prompt += """
-⚠️ **数据缺失警告**
-由于接口限制，当前无法获取完整的实时行情和技术指标数据。
-请 **忽略上述表格中的 N/A 数据**，重点依据 **【📰 舆情情报】** 中的新闻进行基本面和情绪面分析。
-在回答技术面问题（如均线、乖离率）时，请直接说明“数据缺失，无法判断”，**严禁编造数据**。
-"""
+            parts.append(self._PROMPT_DATA_MISSING)
 
         # 明确的输出要求
-        prompt += f"""
+        parts.append(f"""
 ---
 
 ## ✅ 分析任务
 
 请为 **{stock_name}({code})** 生成【决策仪表盘】，严格按照 JSON 格式输出。
-"""
+""")
         if context.get('is_index_etf'):
-            prompt += """
-> ⚠️ **指数/ETF 分析约束**：该标的为指数跟踪型 ETF 或市场指数。
-> - 风险分析仅关注：**指数走势、跟踪误差、市场流动性**
-> - 严禁将基金公司的诉讼、声誉、高管变动纳入风险警报
-> - 业绩预期基于**指数成分股整体表现**，而非基金公司财报
-> - `risk_alerts` 中不得出现基金管理人相关的公司经营风险
-
-"""
-        prompt += f"""
+            parts.append(self._PROMPT_INDEX_ETF)
+        parts.append(f"""
 ### ⚠️ 重要：输出正确的股票名称格式
 正确的股票名称格式为“股票名称（股票代码）”，例如“贵州茅台（600519）”。
 如果上方显示的股票名称为"股票{code}"或不正确，请在分析开头**明确输出该股票的正确中文全称**。
@@ -1188,9 +1454,9 @@ class GeminiAnalyzer:
 - **具体狙击点位**：买入价、止损价、目标价（精确到分）
 - **检查清单**：每项用 ✅/⚠️/❌ 标记
 
-请输出完整的 JSON 格式决策仪表盘。"""
-        
-        return prompt
+请输出完整的 JSON 格式决策仪表盘。""")
+
+        return ''.join(parts)
     
     def _format_volume(self, volume: Optional[float]) -> str:
         """格式化成交量显示"""
@@ -1352,7 +1618,7 @@ class GeminiAnalyzer:
                 # 尝试修复常见的 JSON 问题
                 json_str = self._fix_json_string(json_str)
                 
-                data = json.loads(json_str)
+                data = _json_loads(json_str)
 
                 # Schema validation (lenient: on failure, continue with raw dict)
                 try:
@@ -1426,21 +1692,25 @@ class GeminiAnalyzer:
                 logger.warning(f"无法从响应中提取 JSON，使用原始文本分析")
                 return self._parse_text_response(response_text, code, name)
                 
-        except json.JSONDecodeError as e:
+        except ValueError as e:  # json.JSONDecodeError / orjson.JSONDecodeError 均为 ValueError 子类
             logger.warning(f"JSON 解析失败: {e}，尝试从文本提取")
             return self._parse_text_response(response_text, code, name)
     
+    # JSON 修复用正则（类级编译一次，避免每次解析都查 re 内部缓存）
+    _LINE_COMMENT_RE = re.compile(r'//.*?\n')
+    _BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+    _TRAILING_COMMA_OBJ_RE = re.compile(r',\s*}')
+    _TRAILING_COMMA_ARR_RE = re.compile(r',\s*]')
+
     def _fix_json_string(self, json_str: str) -> str:
         """修复常见的 JSON 格式问题"""
-        import re
-        
         # 移除注释
-        json_str = re.sub(r'//.*?\n', '\n', json_str)
-        json_str = re.sub(r'/\*.*?\*/', '', json_str, flags=re.DOTALL)
-        
+        json_str = self._LINE_COMMENT_RE.sub('\n', json_str)
+        json_str = self._BLOCK_COMMENT_RE.sub('', json_str)
+
         # 修复尾随逗号
-        json_str = re.sub(r',\s*}', '}', json_str)
-        json_str = re.sub(r',\s*]', ']', json_str)
+        json_str = self._TRAILING_COMMA_OBJ_RE.sub('}', json_str)
+        json_str = self._TRAILING_COMMA_ARR_RE.sub(']', json_str)
         
         # 确保布尔值是小写
         json_str = json_str.replace('True', 'true').replace('False', 'false')
@@ -1520,17 +1790,241 @@ class GeminiAnalyzer:
             AnalysisResult 列表
         """
         results = []
-        
+
         for i, context in enumerate(contexts):
             if i > 0:
                 logger.debug(f"等待 {delay_between} 秒后继续...")
                 time.sleep(delay_between)
-            
+
             result = self.analyze(context)
             results.append(result)
-        
+
         return results
 
+    async def analyze_async(self, context: Dict[str, Any], news_context: Optional[str] = None) -> AnalysisResult:
+        """analyze() 的异步包装：在线程中执行阻塞的 LLM 调用，不阻塞事件循环"""
+        return await asyncio.to_thread(self.analyze, context, news_context)
+
+    async def analyze_many(
+        self,
+        contexts: List[Dict[str, Any]],
+        max_concurrency: int = 10,
+        rpm: Optional[int] = None,
+    ) -> List[AnalysisResult]:
+        """
+        并发批量分析多只股票
+
+        与 batch_analyze 的串行逐个调用不同，analyze_many 将 N 个独立的
+        LLM 调用（纯 I/O 等待）用 asyncio.gather 扇出，由信号量限制同时
+        在途的请求数，整体耗时从"各次调用之和"降到接近"最慢一次调用"。
+
+        Args:
+            contexts: 上下文数据列表
+            max_concurrency: 最大并发请求数（默认 10）
+            rpm: 每分钟最大请求数（可选，滑动窗口限流；None 表示不限）
+
+        Returns:
+            AnalysisResult 列表（与 contexts 顺序一致）
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+        window: deque = deque()  # 最近一分钟内的请求时间戳（滑动窗口限流）
+
+        async def _acquire_rate_slot() -> None:
+            if not rpm:
+                return
+            while True:
+                now = time.monotonic()
+                while window and now - window[0] > 60.0:
+                    window.popleft()
+                if len(window) < rpm:
+                    window.append(now)
+                    return
+                await asyncio.sleep(60.0 - (now - window[0]) + 0.05)
+
+        async def _one(context: Dict[str, Any]) -> AnalysisResult:
+            async with sem:
+                await _acquire_rate_slot()
+                return await self.analyze_async(context)
+
+        # 批内去重：完全相同的 Prompt 只调用一次 LLM，结果分发给所有请求方
+        # （重跑部分失败的批次、多组合含同一股票时很常见）
+        groups: Dict[str, List[int]] = {}
+        for i, context in enumerate(contexts):
+            groups.setdefault(self._prompt_digest(context), []).append(i)
+
+        if len(groups) < len(contexts):
+            logger.info(
+                "[批量去重] %d 个请求去重为 %d 个唯一 Prompt", len(contexts), len(groups)
+            )
+
+        # 按 Prompt 形态排序后派发：模板相近的请求在时间上相邻，
+        # 提高服务端前缀缓存（KV cache）的命中率；结果仍按原顺序返回
+        ordered_groups = sorted(
+            groups.values(),
+            key=lambda positions: self._prefix_key(contexts[positions[0]]),
+        )
+        rep_results = await asyncio.gather(
+            *[_one(contexts[positions[0]]) for positions in ordered_groups]
+        )
+
+        results: List[Optional[AnalysisResult]] = [None] * len(contexts)
+        for positions, result in zip(ordered_groups, rep_results):
+            results[positions[0]] = result
+            for i in positions[1:]:
+                # 副本而非共享引用：下游会就地补全/修改结果对象
+                results[i] = replace(result)
+        return results  # type: ignore[return-value]
+
+    @staticmethod
+    def _prefix_key(context: Dict[str, Any]) -> Tuple:
+        """批量派发排序键：Prompt 模板形态相同的请求共享更长的公共前缀"""
+        return (
+            bool(context.get('is_index_etf')),
+            'realtime' in context,
+            'chip' in context,
+            'trend_analysis' in context,
+            context.get('code', ''),
+        )
+
+    def _prompt_digest(self, context: Dict[str, Any], news_context: Optional[str] = None) -> str:
+        """计算单次分析的 Prompt 摘要（blake2b，128 位足以避免批内碰撞）"""
+        code = context.get('code', 'Unknown')
+        name = context.get('stock_name') or STOCK_NAME_MAP.get(code, f'股票{code}')
+        prompt = self._format_prompt(context, name, news_context)
+        return hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).hexdigest()
+
+    def analyze_batch_offline(
+        self,
+        contexts: List[Dict[str, Any]],
+        completion_window: str = "24h",
+        poll_interval: float = 30.0,
+        max_wait: float = 86400.0,
+    ) -> List[AnalysisResult]:
+        """
+        离线批量分析（OpenAI Batch API，24h SLA，token 5 折）
+
+        适用于对时效不敏感的夜间定时任务：把整个自选股列表打包成一个
+        JSONL 批次上传，轮询完成后按 custom_id 映射回结果。批量接口
+        有独立的并发配额，不占用实时 RPM 限额。
+
+        仅支持 OpenAI 兼容的主模型（openai/ 前缀或无前缀）；其他模型
+        自动回退到串行 batch_analyze。
+
+        Args:
+            contexts: 上下文数据列表
+            completion_window: 批次完成窗口（目前 OpenAI 仅支持 "24h"）
+            poll_interval: 轮询间隔（秒）
+            max_wait: 最长等待时间（秒），超时回退串行分析
+
+        Returns:
+            AnalysisResult 列表（与 contexts 顺序一致）
+        """
+        import io
+
+        model = self._config.litellm_model or ""
+        provider_ok = model.startswith("openai/") or "/" not in model
+        if not provider_ok or not contexts:
+            if contexts:
+                logger.info(f"[Batch API] 模型 {model} 不支持批量接口，回退串行分析")
+            return self.batch_analyze(contexts)
+
+        # 按 code 组织上下文，code 即 custom_id
+        names: Dict[str, str] = {}
+        lines: List[str] = []
+        for context in contexts:
+            code = context.get('code', 'Unknown')
+            name = context.get('stock_name') or STOCK_NAME_MAP.get(code, f'股票{code}')
+            names[code] = name
+            prompt = self._format_prompt(context, name, None)
+            lines.append(json.dumps({
+                "custom_id": code,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model.split("/", 1)[-1],
+                    "messages": [
+                        self._SYSTEM_MESSAGE,
+                        {"role": "user", "content": prompt},
+                    ],
+                    "temperature": self._config.gemini_temperature,
+                    "max_tokens": 8192,
+                },
+            }, ensure_ascii=False))
+
+        try:
+            litellm = _litellm()
+            keys = get_api_keys_for_model(model, self._config)
+            api_kwargs: Dict[str, Any] = {"custom_llm_provider": "openai"}
+            if keys:
+                api_kwargs["api_key"] = keys[0]
+            if self._config.openai_base_url:
+                api_kwargs["api_base"] = self._config.openai_base_url
+
+            buf = io.BytesIO("\n".join(lines).encode("utf-8"))
+            buf.name = "daily_analysis_batch.jsonl"
+            batch_file = litellm.create_file(file=buf, purpose="batch", **api_kwargs)
+            batch = litellm.create_batch(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window=completion_window,
+                **api_kwargs,
+            )
+            logger.info(f"[Batch API] 批次已提交: {batch.id}（{len(lines)} 个请求）")
+
+            deadline = time.monotonic() + max_wait
+            while True:
+                batch = litellm.retrieve_batch(batch_id=batch.id, **api_kwargs)
+                if batch.status == "completed":
+                    break
+                if batch.status in ("failed", "expired", "cancelled"):
+                    raise RuntimeError(f"批次终止，状态: {batch.status}")
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"批次 {batch.id} 超过 {max_wait:.0f}s 未完成")
+                logger.debug("[Batch API] 批次 %s 状态 %s，%.0fs 后重查", batch.id, batch.status, poll_interval)
+                time.sleep(poll_interval)
+
+            raw = litellm.file_content(file_id=batch.output_file_id, **api_kwargs)
+            content = raw.content.decode("utf-8") if isinstance(raw.content, bytes) else str(raw.content)
+
+            by_code: Dict[str, AnalysisResult] = {}
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                code = row.get("custom_id", "Unknown")
+                body = (row.get("response") or {}).get("body") or {}
+                choices = body.get("choices") or []
+                text = (choices[0].get("message") or {}).get("content") if choices else None
+                if text:
+                    result = self._parse_response(text, code, names.get(code, f'股票{code}'))
+                    result.raw_response = text
+                    result.model_used = model
+                    by_code[code] = result
+
+            results = []
+            for context in contexts:
+                code = context.get('code', 'Unknown')
+                result = by_code.get(code)
+                if result is None:
+                    result = AnalysisResult(
+                        code=code,
+                        name=names.get(code, f'股票{code}'),
+                        sentiment_score=50,
+                        trend_prediction='震荡',
+                        operation_advice='持有',
+                        confidence_level='低',
+                        analysis_summary='批量分析未返回该股票的结果',
+                        success=False,
+                        error_message='Batch API 结果缺失',
+                        model_used=model,
+                    )
+                results.append(result)
+            return results
+
+        except Exception as e:
+            logger.error(f"[Batch API] 批量分析失败，回退串行分析: {e}")
+            return self.batch_analyze(contexts)
+
 
 # 便捷函数
 def get_analyzer() -> GeminiAnalyzer:
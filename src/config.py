@@ -199,6 +199,16 @@ class Config:
     # 仅分析结果摘要：true 时只推送汇总，不含个股详情（Issue #262）
     report_summary_only: bool = False
 
+    # === LLM 响应缓存（命中时跳过 LLM 调用，节省 token 与延迟）===
+    llm_cache_enabled: bool = False  # 默认关闭（零回归），开启后同日重跑直接复用缓存
+    llm_cache_ttl: int = 86400       # 缓存有效期（秒），默认 1 天
+    llm_cache_dir: str = "./data/llm_cache"  # 缓存目录
+
+    # === 新闻上下文 token 预算（0 = 不截断）===
+    # 过长的新闻块会线性推高输入 token 成本与首 token 延迟，
+    # 截断时保留头部（搜索结果按相关度降序拼接，头部最有价值）
+    news_token_budget: int = 0
+
     # Report Engine P0: Jinja2 renderer and integrity checks
     report_templates_dir: str = "templates"  # Template directory (relative to project root)
     report_renderer_enabled: bool = False  # Enable Jinja2 rendering (default off for zero regression)
@@ -659,6 +669,10 @@ class Config:
             single_stock_notify=os.getenv('SINGLE_STOCK_NOTIFY', 'false').lower() == 'true',
             report_type=cls._parse_report_type(os.getenv('REPORT_TYPE', 'simple')),
             report_summary_only=os.getenv('REPORT_SUMMARY_ONLY', 'false').lower() == 'true',
+            llm_cache_enabled=os.getenv('LLM_CACHE_ENABLED', 'false').lower() == 'true',
+            llm_cache_ttl=int(os.getenv('LLM_CACHE_TTL', '86400')),
+            llm_cache_dir=os.getenv('LLM_CACHE_DIR', './data/llm_cache'),
+            news_token_budget=int(os.getenv('NEWS_TOKEN_BUDGET', '0')),
             report_templates_dir=os.getenv('REPORT_TEMPLATES_DIR', 'templates'),
             report_renderer_enabled=os.getenv('REPORT_RENDERER_ENABLED', 'false').lower() == 'true',
             report_integrity_enabled=os.getenv('REPORT_INTEGRITY_ENABLED', 'true').lower() == 'true',
@@ -7,6 +7,8 @@
 Shared stock code -> name mapping, used by analyzer, data_provider, and name_to_code_resolver.
 """
 
+import sys
+
 # Stock code -> name mapping (common stocks)
 STOCK_NAME_MAP = {
     # === A-shares ===
@@ -61,3 +63,8 @@ STOCK_NAME_MAP = {
     "00941": "中国移动",
     "00883": "中国海洋石油",
 }
+
+# 代码键在 analyze 热路径上每次调用都要查一次；intern 后相同代码共享同一
+# str 对象，dict 查找先走指针相等即可命中，跳过逐字符比较。
+# 注意：map 会在运行时被 analyzer 回填新代码（非只读），回填处同样 intern。
+STOCK_NAME_MAP = {sys.intern(code): name for code, name in STOCK_NAME_MAP.items()}
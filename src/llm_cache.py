@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+LLM 响应持久化缓存
+===================================
+
+职责：
+1. 以 (system_prompt, prompt, model, temperature) 的 SHA-256 为键缓存 LLM 响应
+2. 缓存落盘（JSON 文件），带 TTL，跨进程重跑时命中可完全跳过 LLM 调用
+3. 供 GeminiAnalyzer 在 _call_litellm 前后调用
+
+说明：精确匹配缓存。分析 Prompt 中包含日期与行情数据，
+数据变化后键自然失效，因此同日重跑命中、次日自动未命中。
+"""
+
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """基于文件系统的 LLM 响应缓存（精确匹配 + TTL）"""
+
+    def __init__(self, cache_dir: str = "./data/llm_cache", ttl: int = 86400):
+        """
+        Args:
+            cache_dir: 缓存目录（不存在时自动创建）
+            ttl: 缓存有效期（秒），默认 1 天
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._prune_expired()
+        except OSError as e:
+            logger.warning(f"[LLM缓存] 缓存目录初始化失败，缓存不可用: {e}")
+
+    @staticmethod
+    def make_key(system_prompt: str, prompt: str, model: str, temperature: float = 0.0) -> str:
+        """构建缓存键：对调用的全部不变量做 SHA-256"""
+        payload = f"{system_prompt}\x00{prompt}\x00{model}\x00{temperature}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存项。命中返回 {"text":..., "model":...}；过期或不存在返回 None"""
+        path = self._path_for(key)
+        try:
+            if not path.exists():
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if time.time() - entry.get("ts", 0) > self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            return entry
+        except (OSError, ValueError) as e:
+            logger.debug(f"[LLM缓存] 读取缓存失败: {e}")
+            return None
+
+    def set(self, key: str, text: str, model: str) -> None:
+        """写入缓存项（失败仅记录日志，不影响主流程）"""
+        path = self._path_for(key)
+        try:
+            entry = {"ts": time.time(), "text": text, "model": model}
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f"[LLM缓存] 写入缓存失败: {e}")
+
+    def _prune_expired(self) -> None:
+        """清理过期缓存文件"""
+        now = time.time()
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                if now - entry.get("ts", 0) > self.ttl:
+                    path.unlink(missing_ok=True)
+            except (OSError, ValueError):
+                # 损坏的缓存文件直接删除
+                path.unlink(missing_ok=True)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+批量分析（并发）测试
+===================================
+
+Tests for GeminiAnalyzer.analyze_many: result ordering, concurrency cap.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+try:
+    import litellm  # noqa: F401
+except ModuleNotFoundError:
+    sys.modules["litellm"] = MagicMock()
+
+from src.analyzer import AnalysisResult, GeminiAnalyzer
+
+
+def _make_analyzer() -> GeminiAnalyzer:
+    with patch.object(GeminiAnalyzer, "_init_litellm", return_value=None):
+        return GeminiAnalyzer()
+
+
+def _result_for(code: str) -> AnalysisResult:
+    return AnalysisResult(
+        code=code,
+        name=f"股票{code}",
+        sentiment_score=50,
+        trend_prediction="震荡",
+        operation_advice="持有",
+    )
+
+
+class TestAnalyzeMany(unittest.TestCase):
+    """Concurrent batch analysis tests."""
+
+    def test_results_preserve_context_order(self) -> None:
+        """analyze_many returns results in the same order as the input contexts."""
+        analyzer = _make_analyzer()
+        codes = ["600519", "000001", "300750"]
+        with patch.object(analyzer, "analyze", side_effect=lambda c, n=None: _result_for(c["code"])):
+            results = asyncio.run(analyzer.analyze_many([{"code": c} for c in codes]))
+        self.assertEqual([r.code for r in results], codes)
+
+    def test_concurrency_is_capped_by_semaphore(self) -> None:
+        """No more than max_concurrency analyze calls run at the same time."""
+        analyzer = _make_analyzer()
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def _slow_analyze(context, news_context=None):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight -= 1
+            return _result_for(context["code"])
+
+        contexts = [{"code": f"60{i:04d}"} for i in range(8)]
+        with patch.object(analyzer, "analyze", side_effect=_slow_analyze):
+            asyncio.run(analyzer.analyze_many(contexts, max_concurrency=2))
+        self.assertLessEqual(peak, 2)
+
+    def test_duplicate_prompts_hit_llm_once(self) -> None:
+        """Identical contexts are deduplicated: one LLM call, result scattered to all."""
+        analyzer = _make_analyzer()
+        contexts = [{"code": "600519"}, {"code": "000001"}, {"code": "600519"}]
+        calls = []
+
+        def _analyze(context, news_context=None):
+            calls.append(context["code"])
+            return _result_for(context["code"])
+
+        with patch.object(analyzer, "analyze", side_effect=_analyze):
+            results = asyncio.run(analyzer.analyze_many(contexts))
+
+        self.assertEqual(sorted(calls), ["000001", "600519"])
+        self.assertEqual([r.code for r in results], ["600519", "000001", "600519"])
+        # Duplicates get独立副本, not a shared mutable result object
+        self.assertIsNot(results[0], results[2])
+        self.assertEqual(results[0], results[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+LLM 响应缓存测试
+===================================
+
+Tests for LLMResponseCache: key stability, get/set roundtrip, TTL expiry,
+and corrupted-file tolerance.
+"""
+
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from src.llm_cache import LLMResponseCache
+
+
+class TestLLMResponseCache(unittest.TestCase):
+    """File-backed exact-match response cache tests."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = LLMResponseCache(cache_dir=self._tmp.name, ttl=3600)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_make_key_is_stable_and_input_sensitive(self) -> None:
+        """Same inputs produce the same key; any changed input produces a new key."""
+        k1 = LLMResponseCache.make_key("sys", "prompt", "gemini/flash", 0.7)
+        k2 = LLMResponseCache.make_key("sys", "prompt", "gemini/flash", 0.7)
+        self.assertEqual(k1, k2)
+        self.assertNotEqual(k1, LLMResponseCache.make_key("sys", "prompt2", "gemini/flash", 0.7))
+        self.assertNotEqual(k1, LLMResponseCache.make_key("sys", "prompt", "openai/gpt-4o", 0.7))
+        self.assertNotEqual(k1, LLMResponseCache.make_key("sys", "prompt", "gemini/flash", 0.3))
+
+    def test_get_set_roundtrip(self) -> None:
+        """A stored response is returned on the next get with the same key."""
+        key = LLMResponseCache.make_key("s", "p", "m", 0.7)
+        self.assertIsNone(self.cache.get(key))
+        self.cache.set(key, '{"sentiment_score": 66}', "gemini/flash")
+        entry = self.cache.get(key)
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry["text"], '{"sentiment_score": 66}')
+        self.assertEqual(entry["model"], "gemini/flash")
+
+    def test_expired_entry_returns_none(self) -> None:
+        """An entry older than the TTL is treated as a miss and removed."""
+        cache = LLMResponseCache(cache_dir=self._tmp.name, ttl=1)
+        key = LLMResponseCache.make_key("s", "p", "m", 0.7)
+        cache.set(key, "old", "m")
+        # Backdate the entry past the TTL
+        path = Path(self._tmp.name) / f"{key}.json"
+        entry = json.loads(path.read_text(encoding="utf-8"))
+        entry["ts"] = time.time() - 10
+        path.write_text(json.dumps(entry), encoding="utf-8")
+        self.assertIsNone(cache.get(key))
+        self.assertFalse(path.exists())
+
+    def test_corrupted_file_is_a_miss(self) -> None:
+        """A corrupted cache file is tolerated and treated as a miss."""
+        key = LLMResponseCache.make_key("s", "p", "m", 0.7)
+        path = Path(self._tmp.name) / f"{key}.json"
+        path.write_text("not-json{", encoding="utf-8")
+        self.assertIsNone(self.cache.get(key))
+
+
+if __name__ == "__main__":
+    unittest.main()